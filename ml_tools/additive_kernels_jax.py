@@ -1,6 +1,5 @@
 import jax.numpy as jnp
 from jax.lax import fori_loop
-from jax.ops import index_update
 from jax import jit
 from functools import partial
 
@@ -29,7 +28,7 @@ def _outer_fun(n, vals):
 
     result = fori_loop(1, n + 1, _inner_fun, vals)
 
-    vals["es"] = index_update(vals["es"], n, result["cur_total"] / n)
+    vals["es"] = vals["es"].at[n].set(result["cur_total"] / n)
 
     return vals
 
@@ -45,7 +44,7 @@ def _run_newton_girard_loop(init_vals, N):
 def newton_girard_combination_for_loop(kerns, N):
 
     init_es = jnp.zeros((N + 1, *kerns[0].shape))
-    init_es = index_update(init_es, 0, 1.0)
+    init_es = init_es.at[0].set(1.0)
 
     init_vals = {
         "zs": jnp.array(kerns),
@@ -75,7 +74,7 @@ def newton_girard_inner_loop_python(es, zs, N):
 
             cur_total = cur_total + cur_e * cur_sk * cur_sign
 
-        es = index_update(es, cur_n, cur_total / cur_n)
+        es = es.at[cur_n].set(cur_total / cur_n)
 
     return es[1:]
 
@@ -85,7 +84,7 @@ def newton_girard_combination(kerns, N):
        one for each order of interaction."""
 
     es = jnp.zeros((N + 1, *kerns[0].shape))
-    es = index_update(es, 0, 1.0)
+    es = es.at[0].set(1.0)
     zs = kerns
 
     return newton_girard_inner_loop_python(es, zs, N)
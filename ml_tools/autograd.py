@@ -1,9 +1,11 @@
 from autograd import make_jvp
 import autograd.numpy as np
 from typing import Callable, Tuple
-from autograd import hessian, jacobian
+from autograd import grad, hessian, jacobian
 from scipy.optimize import minimize
 from autograd.scipy.special import expit
+from autograd.scipy.linalg import solve_triangular
+from ml_tools.lin_alg import cholesky_inverse
 
 
 def forward_grad_vector(fun, arg_no, n_derivs, *args):
@@ -12,38 +14,42 @@ def forward_grad_vector(fun, arg_no, n_derivs, *args):
     # ard_rbf_kernel_efficient, 3, lscales.shape[0], X, X, var, lscales)
     # TODO: Maybe make syntax agree even more with the current autograd.
 
-    grad = make_jvp(fun, arg_no)
+    # Evaluate the JVP at the arguments once; only the tangent varies in the
+    # loop, so the primal trace isn't redone for every basis vector.
+    jvp_fn = make_jvp(fun, arg_no)(*args)
     all_indices = np.eye(n_derivs)
 
-    all_grads = list()
-
-    for cur_index in all_indices:
-
-        all_grads.append(grad(*args)(cur_index)[1])
-
-    return np.stack(all_grads, -1)
+    return np.stack([jvp_fn(cur_index)[1] for cur_index in all_indices], -1)
 
 
 def multivariate_normal_zero_mean_from_inv(x, cov_inv):
 
     n = cov_inv.shape[0]
-    sign, logdet = np.linalg.slogdet(cov_inv)
-    logdet = sign * logdet
+
+    # One Cholesky gives both the log determinant and the quadratic form,
+    # since with cov_inv = C C^T we have x^T cov_inv x = ||C^T x||^2.
+    chol = np.linalg.cholesky(cov_inv)
+    logdet = 2 * np.sum(np.log(np.diag(chol)))
     det_term = 0.5 * (logdet - n * np.log(2 * np.pi))
 
-    logpdf = det_term - 0.5 * x @ cov_inv @ x
+    white_x = chol.T @ x
+
+    logpdf = det_term - 0.5 * white_x @ white_x
     return logpdf
 
 
 def multivariate_normal_logpdf(x, cov):
 
-    sign, logdet = np.linalg.slogdet(np.pi * 2 * cov)
-    logdet = sign * logdet
-    det_term = -0.5 * logdet
+    n = cov.shape[0]
+
+    # A single Cholesky factorisation provides both the determinant term and
+    # the quadratic form [via a triangular solve].
+    chol = np.linalg.cholesky(cov)
+    logdet = 2 * np.sum(np.log(np.diag(chol)))
+
+    alpha = solve_triangular(chol, x, lower=True)
 
-    # TODO: Could be improved by using some kind of Cholesky here rather than
-    # inverse -- or even a solve.
-    total_prior = det_term - 0.5 * x @ np.linalg.inv(cov) @ x
+    total_prior = -0.5 * (logdet + n * np.log(2 * np.pi) + alpha @ alpha)
 
     return total_prior
 
@@ -74,50 +80,73 @@ def fit_laplace_approximation(neg_log_posterior_fun: Callable[[np.ndarray],
         indicating whether the optimization succeeded.
     """
 
-    jac = jacobian(neg_log_posterior_fun)
-    hess = hessian(neg_log_posterior_fun)
+    jac = grad(neg_log_posterior_fun)
+
+    # A Hessian-vector product is all Newton-CG needs, and it avoids
+    # materialising the full Hessian at every step.
+    def hessp(x, v):
+        return make_jvp(jac)(x)(v)[1]
 
-    result = minimize(neg_log_posterior_fun, start_val, jac=jac, hess=hess,
+    result = minimize(neg_log_posterior_fun, start_val, jac=jac, hessp=hessp,
                       method=optimization_method)
 
-    covariance_approx = np.linalg.inv(hess(result.x))
+    # Only build the dense Hessian once, at the mode.
+    hess_at_mode = hessian(neg_log_posterior_fun)(result.x)
+    covariance_approx = cholesky_inverse(hess_at_mode)
     mean_approx = result.x
 
     return mean_approx, covariance_approx, result.success
 
 
+def _linear_regression_online_update(m_km1, P_km1, H, m_obs, var_obs):
+    # Assert-free core of linear_regression_online_update, for callers
+    # [e.g. LinearGaussianUpdate] that have already validated shapes.
+
+    v_k = m_obs - H @ m_km1
+
+    # P H^T shows up three times below [in S_k, K_k and the covariance
+    # update, since K_k S_k = P H^T], so compute it once.
+    PHt = P_km1 @ H.T
+    S_k = H @ PHt + var_obs
+
+    if S_k.shape == (1, 1):
+        K_k = PHt * (1 / S_k)
+    else:
+        K_k = np.linalg.solve(S_k, PHt.T).T
+
+    m_k = m_km1 + K_k @ v_k
+    P_k = P_km1 - PHt @ K_k.T
+
+    # Calculate the log marginal likelihood here too
+    if S_k.shape == (1, 1):
+        # Scalar observation [the common Kalman filter case]: a few flops
+        # instead of a Cholesky and a dense solve.
+        s = S_k[0, 0]
+        logdet = np.log(2 * np.pi * s)
+        quadratic_term = 0.5 * v_k[0, 0]**2 / s
+    else:
+        # TODO: CHECK THIS
+        logdet = logdet_via_cholesky(2 * np.pi * S_k)
+        quadratic_term = 0.5 * v_k.T @ np.linalg.solve(S_k, v_k)
+
+    energy_contrib = 0.5 * logdet + quadratic_term
+
+    return m_k, P_k, np.squeeze(energy_contrib)
+
+
 def linear_regression_online_update(m_km1, P_km1, H, m_obs, var_obs):
     # m_km1: Prior mean
     # P_km1: Prior cov
     # H: Link from latent to observed
     # m_obs: Mean of observation
     # var_obs: Variance of observation
+    # Returns mean, cov, and _negative_ log marg lik.
 
     # We need to work with matrices here or the maths will be wrong
     assert all([len(x.shape) == 2 for x in [m_km1, H]]), \
         'm_km1 and H must have two dimensions each!'
 
-    v_k = m_obs - H @ m_km1
-
-    S_k = H @ P_km1 @ H.T + var_obs
-    K_k = P_km1 @ H.T * (1 / S_k)
-    m_k = m_km1 + K_k * v_k
-    P_k = P_km1 - (K_k * S_k) @ K_k.T
-
-    # Calculate the log marginal likelihood here too
-    # sign, logdet = np.linalg.slogdet(2 * np.pi * S_k)
-    # logdet_a = sign * logdet
-
-    # Do this another way
-    # rel_chol = np.linalg.cholesky(2 * np.pi * S_k)
-    # TODO: CHECK THIS
-    logdet = logdet_via_cholesky(2 * np.pi * S_k)
-
-    # Second part
-    quadratic_term = 0.5 * v_k.T @ np.linalg.solve(S_k, v_k)
-    energy_contrib = 0.5 * logdet + quadratic_term
-
-    return m_k, P_k, np.squeeze(energy_contrib)
+    return _linear_regression_online_update(m_km1, P_km1, H, m_obs, var_obs)
 
 
 def logistic_normal_integral_approx(mu, var):
@@ -4,12 +4,13 @@ from functools import partial
 from collections import namedtuple, OrderedDict
 
 
-array_info = namedtuple('array_info', 'shape')
+array_info = namedtuple('array_info', 'shape size')
 
 
 def extract_info(array):
 
-    return array_info(shape=array.shape)
+    # Cast to int is there to have this definitely work with TF
+    return array_info(shape=array.shape, size=int(np.prod(array.shape)))
 
 
 def flatten_and_summarise(**input_arrays):
@@ -20,7 +21,20 @@ def flatten_and_summarise(**input_arrays):
         {x: extract_info(y) for x, y in input_arrays.items()}
     )
 
-    flattened = np.concatenate([y.reshape(-1) for y in input_arrays.values()])
+    # Copy straight into a preallocated buffer rather than concatenating
+    # temporary 1D views, which would mean a second pass over the data.
+    # result_type matches np.concatenate's promotion for mixed dtypes.
+    total_elements = sum(x.size for x in summaries.values())
+    common_dtype = np.result_type(*[y.dtype for y in input_arrays.values()])
+    flattened = np.empty(total_elements, dtype=common_dtype)
+
+    cur_offset = 0
+
+    for cur_array in input_arrays.values():
+
+        cur_elements = cur_array.size
+        flattened[cur_offset:cur_offset + cur_elements] = cur_array.ravel()
+        cur_offset += cur_elements
 
     return flattened, summaries
 
@@ -34,37 +48,46 @@ def flatten_and_summarise_tf(**input_arrays):
         {x: extract_info(y) for x, y in input_arrays.items()}
     )
 
-    flattened = tf.concat([tf.reshape(y, (-1,)) for y in
-                           input_arrays.values()], axis=0)
+    reshaped = [tf.reshape(y, (-1,)) for y in input_arrays.values()]
+    flattened = tf.concat(reshaped, axis=0)
 
     return flattened, summaries
 
 
-def reconstruct(flat_array, summaries, reshape_fun):
+def flatten_and_summarise_jax(**input_arrays):
+    """
+    JAX counterpart of flatten_and_summarise. Returns the flat vector and an
+    unflatten function [rather than summaries]: OrderedDicts are native JAX
+    PyTrees, so the flatten/unflatten tree walk happens in jax's C++
+    tree_util rather than in Python, and the unflatten function can be used
+    inside jitted code.
+    """
 
-    # Base case
-    if len(summaries) == 0:
+    # Imported here so the numpy/TF paths don't require jax.
+    from jax.flatten_util import ravel_pytree
 
-        return {}
+    flattened, unflatten_fun = ravel_pytree(OrderedDict(input_arrays))
 
-    cur_name, cur_summary = list(summaries.items())[0]
+    return flattened, unflatten_fun
 
-    # Cast to int is there to have this definitely work with TF
-    cur_elements = int(np.prod(cur_summary.shape))
 
-    cur_result = {
-        cur_name: reshape_fun(flat_array[:cur_elements], cur_summary.shape)
-    }
+def reconstruct(flat_array, summaries, reshape_fun):
 
-    remaining_summaries = OrderedDict(
-        {x: y for x, y in summaries.items() if x != cur_name}
-    )
+    # Walk the flat array once, keeping a running offset.
+    result = OrderedDict()
+    cur_offset = 0
+
+    for cur_name, cur_summary in summaries.items():
+
+        cur_elements = cur_summary.size
+
+        result[cur_name] = reshape_fun(
+            flat_array[cur_offset:cur_offset + cur_elements],
+            cur_summary.shape)
+
+        cur_offset += cur_elements
 
-    return {
-        **cur_result,
-        **reconstruct(flat_array[cur_elements:], remaining_summaries,
-                      reshape_fun=reshape_fun)
-    }
+    return result
 
 
 # Convenience functions
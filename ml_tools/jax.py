@@ -1,8 +1,7 @@
 import jax.numpy as np
-from jax import lax, hessian, jacobian
+from jax import lax, hessian, jacobian, jvp, vmap
 from typing import Callable, Tuple
 from scipy.optimize import minimize
-from jax.ops.scatter import index_update
 from jax.scipy.special import expit
 import numpy as onp
 from jax import jit
@@ -14,6 +13,25 @@ from jax.scipy.special import gammaln, xlog1py, xlogy
 #     return jit(jacfwd(jacrev(fun, argnum), argnum))
 
 
+def forward_grad_vector(fun, arg_no, n_derivs, *args):
+    # JAX analogue of ml_tools.autograd.forward_grad_vector: the forward-mode
+    # Jacobian of fun w.r.t. argument arg_no, computed by vmapping a JVP over
+    # the identity basis rather than looping in Python.
+
+    def single_jvp(tangent):
+
+        partial_fun = lambda cur_arg: fun(
+            *args[:arg_no], cur_arg, *args[arg_no + 1:])
+
+        _, tangent_out = jvp(partial_fun, (args[arg_no],), (tangent,))
+
+        return tangent_out
+
+    all_tangents = vmap(single_jvp)(np.eye(n_derivs))
+
+    return np.moveaxis(all_tangents, 0, -1)
+
+
 def multivariate_normal_inv_normaliser(cov_inv):
 
     n = cov_inv.shape[0]
@@ -106,7 +124,7 @@ def lo_tri_from_elements(elements, n):
 
     L = np.zeros((n, n))
     indices = np.tril_indices(n)
-    L = index_update(L, indices, elements)
+    L = L.at[indices].set(elements)
 
     return L
 
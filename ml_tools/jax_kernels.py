@@ -1,24 +1,45 @@
 import jax.numpy as jnp
-from jax import jit
+from jax import jit, lax
 from functools import partial
-from jax.ops import index_add
 from .additive_kernels_jax import newton_girard_combination
 from jax import vmap
 
 EPS = 1e-12
 DEFAULT_JITTER = 1e-5
+SQRT3 = 3.0 ** 0.5
 
 
-@jit
-def compute_weighted_square_distances(x1, x2, lengthscales):
+@partial(jit, static_argnums=3)
+def compute_weighted_square_distances(x1, x2, lengthscales, high_precision=True):
 
-    z1 = x1 / jnp.expand_dims(lengthscales, axis=0)
-    z2 = x2 / jnp.expand_dims(lengthscales, axis=0)
+    # Folding the lengthscale weighting into the einsums lets XLA fuse the
+    # scaling with the contraction, so the scaled inputs are never
+    # materialised.
+    inv_sq_lengthscales = 1.0 / lengthscales ** 2
+
+    if high_precision:
+
+        cross_contrib = -2 * jnp.einsum(
+            "id,jd,d->ij", x1, x2, inv_sq_lengthscales
+        )
+
+    else:
 
-    cross_contrib = -2 * z1 @ z2.T
+        # Run the dominant GEMM with bf16 inputs [and an fp32 accumulator],
+        # which uses tensor cores on TPU/recent GPUs. The norms and the exp
+        # downstream stay in full precision.
+        z1 = (x1 * inv_sq_lengthscales).astype(jnp.bfloat16)
+        z2 = x2.astype(jnp.bfloat16)
+
+        cross_contrib = -2 * lax.dot_general(
+            z1,
+            z2,
+            (((1,), (1,)), ((), ())),
+            preferred_element_type=jnp.float32,
+        )
 
-    z1_sq = jnp.sum(z1 ** 2, axis=1)
-    z2_sq = jnp.sum(z2 ** 2, axis=1)
+    z1_sq = jnp.einsum("id,id,d->i", x1, x1, inv_sq_lengthscales)
+    z2_sq = jnp.einsum("jd,jd,d->j", x2, x2, inv_sq_lengthscales)
 
     combined = (
         jnp.expand_dims(z1_sq, axis=1) + cross_contrib + jnp.expand_dims(z2_sq, axis=0)
@@ -46,8 +67,16 @@ def compute_diag_weighted_square_distance(x1, x2, lengthscales):
     return jnp.maximum(norms + cross_terms, 0.0)
 
 
-@partial(jit, static_argnums=4)
-def ard_rbf_kernel(x1, x2, lengthscales, alpha, diag_only=False, jitter=DEFAULT_JITTER):
+@partial(jit, static_argnums=(4, 6))
+def ard_rbf_kernel(
+    x1,
+    x2,
+    lengthscales,
+    alpha,
+    diag_only=False,
+    jitter=DEFAULT_JITTER,
+    high_precision=True,
+):
 
     if diag_only:
 
@@ -55,7 +84,9 @@ def ard_rbf_kernel(x1, x2, lengthscales, alpha, diag_only=False, jitter=DEFAULT_
 
     else:
 
-        r_sq = compute_weighted_square_distances(x1, x2, lengthscales)
+        r_sq = compute_weighted_square_distances(
+            x1, x2, lengthscales, high_precision
+        )
 
     kernel = alpha ** 2 * jnp.exp(-0.5 * r_sq)
 
@@ -65,8 +96,29 @@ def ard_rbf_kernel(x1, x2, lengthscales, alpha, diag_only=False, jitter=DEFAULT_
 
 
 @partial(jit, static_argnums=4)
+def ard_rbf_kernel_batched(
+    x1, x2, lengthscales, alphas, diag_only=False, jitter=DEFAULT_JITTER
+):
+
+    # Batched version of ard_rbf_kernel over K hyperparameter candidates:
+    # lengthscales is K x D and alphas is (K,).
+
+    to_vmap = lambda lengthscale, alpha: ard_rbf_kernel(
+        x1, x2, lengthscale, alpha, diag_only, jitter
+    )
+
+    return vmap(to_vmap)(lengthscales, alphas)
+
+
+@partial(jit, static_argnums=(4, 6))
 def matern_kernel_32(
-    x1, x2, lengthscales, alpha, diag_only=False, jitter=DEFAULT_JITTER
+    x1,
+    x2,
+    lengthscales,
+    alpha,
+    diag_only=False,
+    jitter=DEFAULT_JITTER,
+    high_precision=True,
 ):
 
     if diag_only:
@@ -75,11 +127,18 @@ def matern_kernel_32(
 
     else:
 
-        r_sq = compute_weighted_square_distances(x1, x2, lengthscales)
+        r_sq = compute_weighted_square_distances(
+            x1, x2, lengthscales, high_precision
+        )
 
-    r = jnp.sqrt(r_sq + EPS)
+    # Guard the sqrt with a where rather than adding EPS, so zero distances
+    # give exactly u = 0 [and a zero, not NaN, gradient there]. XLA fuses
+    # the selects into the exp pipeline.
+    positive = r_sq > 0.0
+    safe_r_sq = jnp.where(positive, r_sq, 1.0)
+    u = jnp.where(positive, SQRT3 * jnp.sqrt(safe_r_sq), 0.0)
 
-    kernel = alpha ** 2 * (1 + jnp.sqrt(3.0) * r) * jnp.exp(-jnp.sqrt(3.0) * r)
+    kernel = alpha ** 2 * (1.0 + u) * jnp.exp(-u)
     kernel = add_jitter(kernel, jitter, diag_only)
 
     return kernel
@@ -94,8 +153,10 @@ def add_jitter(kern, jitter=DEFAULT_JITTER, diag_only=False):
 
     else:
 
-        kern = index_add(
-            kern, jnp.diag_indices(min(kern.shape[0], kern.shape[1])), jitter
+        # Adding a scaled rectangular identity fuses into the surrounding
+        # computation under XLA, unlike a scatter on the diagonal indices.
+        kern = kern + jitter * jnp.eye(
+            kern.shape[0], kern.shape[1], dtype=kern.dtype
         )
 
     return kern
@@ -107,18 +168,31 @@ def bias_kernel(x1, x2, sd, diag_only=False, jitter=DEFAULT_JITTER):
     output_rows = x1.shape[0]
     output_cols = x2.shape[0]
 
-    # shape = jnp.stack([output_rows, output_cols])
-
     if diag_only:
         kern = jnp.repeat(sd ** 2, (min(output_cols, output_rows),)) + jitter
     else:
-        # kern = jnp.tile(sd ** 2, shape)
-        kern = jnp.ones((output_rows, output_cols)) * sd ** 2
+        kern = jnp.full((output_rows, output_cols), sd ** 2)
         kern = add_jitter(kern, jitter, diag_only)
 
     return kern
 
 
+def _one_dimensional_kernel(
+    x1, x2, lengthscale, alpha, base_kernel_fun, diag_only, jitter
+):
+    # Applies the base kernel to a single input dimension; defined at module
+    # scope so additive_kernel doesn't rebuild the closure per call.
+
+    return base_kernel_fun(
+        x1.reshape(-1, 1),
+        x2.reshape(-1, 1),
+        lengthscale.reshape(-1,),
+        alpha,
+        diag_only,
+        jitter,
+    )
+
+
 @partial(jit, static_argnums=(5, 6))
 def additive_kernel(
     x1,
@@ -134,13 +208,11 @@ def additive_kernel(
     N = additive_alphas.shape[0]
 
     # TODO: Could make more general to support other kernels
-    to_vmap = lambda x1, x2, lengthscale, alpha: base_kernel_fun(
-        x1.reshape(-1, 1),
-        x2.reshape(-1, 1),
-        lengthscale.reshape(-1,),
-        alpha,
-        diag_only,
-        jitter,
+    to_vmap = partial(
+        _one_dimensional_kernel,
+        base_kernel_fun=base_kernel_fun,
+        diag_only=diag_only,
+        jitter=jitter,
     )
 
     map_res = vmap(to_vmap)(x1.T, x2.T, lengthscales, kernel_alphas)
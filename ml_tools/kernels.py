@@ -15,7 +15,8 @@ def rbf_kernel_1d(x1, x2, alpha, lengthscales, jitter=1e-5):
     return result
 
 
-def ard_rbf_kernel(x1, x2, lengthscales, alpha, jitter=1e-5):
+def ard_rbf_kernel(x1, x2, lengthscales, alpha, jitter=1e-5,
+                   return_grads=True):
 
     # x1 is N1 x D
     # x2 is N2 x D (and N1 can be equal to N2)
@@ -26,36 +27,80 @@ def ard_rbf_kernel(x1, x2, lengthscales, alpha, jitter=1e-5):
     # Also must match lengthscales
     assert(lengthscales.shape[0] == x1.shape[1])
 
-    # Use broadcasting
-    # X1 will be (N1, 1, D)
-    x1_expanded = np.expand_dims(x1, axis=1)
-    # X2 will be (1, N2, D)
-    x2_expanded = np.expand_dims(x2, axis=0)
-
-    # These will be N1 x N2 x D
-    sq_differences = (x1_expanded - x2_expanded)**2
-    inv_sq_lengthscales = 1. / lengthscales**2
-
-    # Use broadcasting to do a dot product
-    exponent = np.sum(sq_differences * inv_sq_lengthscales, axis=2)
+    # Compute the weighted square distances via the expansion
+    # ||z1 - z2||^2 = ||z1||^2 - 2 z1.z2^T + ||z2||^2, which needs only a
+    # matmul and two norms rather than the (N1, N2, D) broadcast.
+    exponent = compute_weighted_square_distances(x1, x2, lengthscales)
+    np.maximum(exponent, 0., out=exponent)
     exponentiated = np.exp(-0.5 * exponent)
 
     kern = alpha**2 * exponentiated
     diag_indices = np.diag_indices(np.min(kern.shape[:2]))
     kern[diag_indices] = kern[diag_indices] + jitter
 
+    if not return_grads:
+        return kern, None, None
+
     # Find gradients
     # Gradient with respect to alpha:
     alpha_grad = 2 * alpha * exponentiated
 
     # Gradient with respect to lengthscales
-    # Square differences should be [N1 x N2 x D]
-    lengthscale_grads = (alpha**2 * np.expand_dims(exponentiated, axis=2) *
-                         sq_differences / (lengthscales**3))
+    # The (N1, N2, D) square differences are only needed on this path, and
+    # even here we build them one block of rows at a time so the working set
+    # stays roughly L2-sized instead of materialising the full 3D tensor.
+    n1, n2 = x1.shape[0], x2.shape[0]
+    n_dims = x1.shape[1]
+
+    block_size = max(1, 131072 // (n2 * n_dims * 8))
+
+    lengthscale_grads = np.empty((n1, n2, n_dims))
+    inv_cube_lengthscales = 1. / lengthscales**3
+
+    for block_start in range(0, n1, block_size):
+
+        block_end = block_start + block_size
+
+        cur_sq_differences = (np.expand_dims(x1[block_start:block_end],
+                                             axis=1) -
+                              np.expand_dims(x2, axis=0))**2
+
+        lengthscale_grads[block_start:block_end] = (
+            alpha**2 *
+            np.expand_dims(exponentiated[block_start:block_end], axis=2) *
+            cur_sq_differences * inv_cube_lengthscales)
 
     return kern, lengthscale_grads, alpha_grad
 
 
+def ard_rbf_kernel_batched(x1, x2, lengthscales, alphas, jitter=1e-5):
+
+    # Evaluates the ARD RBF kernel for K hyperparameter candidates at once:
+    # lengthscales is K x D and alphas is (K,). The N1 x N2 x D square
+    # differences are shared across all K, so a sweep costs one broadcast
+    # plus a single tensordot rather than K separate kernel calls.
+
+    assert(x1.shape[1] == x2.shape[1])
+    assert(lengthscales.shape[1] == x1.shape[1])
+    assert(lengthscales.shape[0] == alphas.shape[0])
+
+    sq_differences = (np.expand_dims(x1, axis=1) -
+                      np.expand_dims(x2, axis=0))**2
+
+    inv_sq_lengthscales = 1. / lengthscales**2
+
+    # K x N1 x N2
+    exponent = np.tensordot(inv_sq_lengthscales, sq_differences,
+                            axes=([1], [2]))
+
+    kern = alphas[:, None, None]**2 * np.exp(-0.5 * exponent)
+
+    diag_indices = np.diag_indices(np.min(kern.shape[1:]))
+    kern[:, diag_indices[0], diag_indices[1]] += jitter
+
+    return kern
+
+
 def compute_weighted_square_distances(x1, x2, lengthscales):
 
     z1 = x1 / np.expand_dims(lengthscales, axis=0)
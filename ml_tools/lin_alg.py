@@ -1,11 +1,39 @@
 import autograd.numpy as np
+import numpy as onp
 import scipy.sparse.linalg as spl
+from functools import lru_cache
 from scipy.linalg import cho_solve, cho_factor, solve_triangular
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+@lru_cache(maxsize=32)
+def _identity_cached(n, dtype_str):
+
+    return onp.eye(n, dtype=onp.dtype(dtype_str))
+
 
 def cholesky_inverse(matrix):
 
-    return cho_solve(cho_factor(matrix, lower=True), np.eye(matrix.shape[0]))
+    # Reuse the identity across calls of the same size; cho_solve allocates
+    # a fresh output, so the cached buffer is never mutated.
+    identity = _identity_cached(matrix.shape[0], matrix.dtype.str)
+
+    return cho_solve(cho_factor(matrix, lower=True), identity)
+
+
+def solve_psd(A, B):
+    """Solves A X = B for positive definite A via a Cholesky factorization.
+
+    Prefer this to cholesky_inverse followed by a matmul: the explicit
+    inverse is never formed.
+    """
+
+    return cho_solve(cho_factor(A, lower=True), B)
 
 
 def compute_sparse_inverse(sparse_matrix):
@@ -16,10 +44,51 @@ def compute_sparse_inverse(sparse_matrix):
     return inverse
 
 
+@lru_cache(maxsize=32)
+def tril_indices_cached(mat_size):
+    # np.tril_indices allocates an O(n^2) index array each call; cache it for
+    # the fixed sizes seen inside optimizer loops.
+
+    return onp.tril_indices(mat_size)
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True)
+    def _unpack_lower_tri(vec, target_size, jitter):
+
+        L = onp.zeros((target_size, target_size))
+        cur_elt = 0
+
+        for i in range(target_size):
+            for j in range(i + 1):
+                L[i, j] = vec[cur_elt]
+                cur_elt += 1
+
+        return L @ L.T + jitter * onp.eye(target_size)
+
+    @njit(cache=True)
+    def _pack_lower_tri(L, target_size):
+
+        vec = onp.empty(target_size * (target_size + 1) // 2)
+        cur_elt = 0
+
+        for i in range(target_size):
+            for j in range(i + 1):
+                vec[cur_elt] = L[i, j]
+                cur_elt += 1
+
+        return vec
+
+
 def pos_def_mat_from_vector(vec, target_size, jitter=0):
 
+    # The numba path only handles plain arrays, not e.g. autograd boxes.
+    if NUMBA_AVAILABLE and isinstance(vec, onp.ndarray):
+        return _unpack_lower_tri(vec, target_size, float(jitter))
+
     L = np.zeros((target_size, target_size))
-    L[np.tril_indices(target_size)] = vec
+    L[tril_indices_cached(target_size)] = vec
 
     return np.matmul(L, L.T) + np.eye(target_size) * jitter
 
@@ -29,9 +98,11 @@ def vector_from_pos_def_mat(pos_def_mat, jitter=0):
     # Subtract jitter
     pos_def_mat -= np.eye(pos_def_mat.shape[0]) * jitter
     L = np.linalg.cholesky(pos_def_mat)
-    elts = np.tril_indices_from(L)
 
-    return L[elts]
+    if NUMBA_AVAILABLE and isinstance(L, onp.ndarray):
+        return _pack_lower_tri(L, L.shape[0])
+
+    return L[tril_indices_cached(L.shape[0])]
 
 
 def num_triangular_elts(mat_size, include_diagonal=True):
@@ -2,8 +2,12 @@ import numpy as np
 import pandas as pd
 from scipy.stats import norm
 import matplotlib.pyplot as plt
-from scipy.linalg import inv, cho_factor, cho_solve
+from scipy.linalg import cho_factor, cho_solve, solve, solve_triangular
 from scipy.special import expit, logsumexp
+# The autograd version works on plain arrays too, so share it rather than
+# keeping a near-identical copy here.
+from ml_tools.autograd import (  # NOQA
+    linear_regression_online_update, _linear_regression_online_update)
 
 
 class MultivariateNormal(object):
@@ -21,6 +25,17 @@ class MultivariateNormal(object):
         self.m = m
         self.v_inv = v_inv
 
+        # Lower Cholesky factor of v_inv, computed lazily. multiply and
+        # divide return fresh objects, so it never needs invalidating.
+        self._chol = None
+
+    def _cholesky(self):
+
+        if self._chol is None:
+            self._chol = np.linalg.cholesky(self.v_inv)
+
+        return self._chol
+
     def multiply(self, m2, v_inv2):
         """
         Multiplies the multivariate normal with another multivariate normal,
@@ -29,10 +44,10 @@ class MultivariateNormal(object):
 
         m1, v_inv1 = self.m, self.v_inv
         summed_inv = v_inv1 + v_inv2
-        summed = inv(summed_inv)
-        pt1 = np.matmul(np.matmul(summed, v_inv1), m1)
-        pt2 = np.matmul(np.matmul(summed, v_inv2), m2)
-        new_m = pt1 + pt2
+        # A Cholesky solve against the combined precision avoids forming the
+        # explicit inverse and is better behaved numerically.
+        rhs = v_inv1 @ m1 + v_inv2 @ m2
+        new_m = cho_solve(cho_factor(summed_inv, lower=True), rhs)
         new_v_inv = summed_inv
         return MultivariateNormal(new_m, new_v_inv)
 
@@ -44,10 +59,15 @@ class MultivariateNormal(object):
 
         m1, v_inv1 = self.m, self.v_inv
         subtracted_inv = v_inv1 - v_inv2
-        subtracted = inv(subtracted_inv)
-        pt1 = np.matmul(np.matmul(subtracted, v_inv1), m1)
-        pt2 = np.matmul(np.matmul(subtracted, v_inv2), m2)
-        new_m = pt1 - pt2
+        rhs = v_inv1 @ m1 - v_inv2 @ m2
+
+        # The difference of two precisions need not be positive definite, so
+        # fall back to a symmetric solve if the Cholesky fails.
+        try:
+            new_m = cho_solve(cho_factor(subtracted_inv, lower=True), rhs)
+        except np.linalg.LinAlgError:
+            new_m = solve(subtracted_inv, rhs, assume_a='sym')
+
         new_v_inv = subtracted_inv
         return MultivariateNormal(new_m, new_v_inv)
 
@@ -62,10 +82,9 @@ class MultivariateNormal(object):
 
         mean_summed_theta = np.dot(self.m, weights)
 
-        cur_cov = inv(self.v_inv)
-        outer_x = np.outer(weights, weights)
-        multiplied = cur_cov * outer_x
-        weighted_sum = np.sum(multiplied)
+        # w^T V w, without ever forming V = inv(v_inv).
+        solved = cho_solve((self._cholesky(), True), weights)
+        weighted_sum = np.dot(weights, solved)
 
         return mean_summed_theta, weighted_sum
 
@@ -80,8 +99,12 @@ class MultivariateNormal(object):
         Returns the marginal variance of the variables.
         """
 
-        cov_matrix = inv(self.v_inv)
-        marginals = np.diagonal(cov_matrix)
+        # The marginals are the diagonal of inv(v_inv); with v_inv = L L^T
+        # they are the squared column norms of L^{-1}, so one [cached]
+        # Cholesky and one triangular solve suffice.
+        L = self._cholesky()
+        L_inv = solve_triangular(L, np.eye(L.shape[0]), lower=True)
+        marginals = np.sum(L_inv**2, axis=0)
         return marginals
 
     def summarise(self):
@@ -189,8 +212,13 @@ def conditional_mean_and_cov(mu_x, mu_y, y, A, C, B):
     # Calculate the conditional mean
     difference = y - mu_y
     b_chol = cho_factor(B)
-    conditional_mean = mu_x + np.matmul(C, cho_solve(b_chol, difference))
-    conditional_cov = A - np.matmul(C, cho_solve(b_chol, C.T))
+
+    # Stack the two right-hand sides so the factorization is applied in a
+    # single solve.
+    solved = cho_solve(b_chol, np.hstack([difference[:, None], C.T]))
+
+    conditional_mean = mu_x + np.matmul(C, solved[:, 0])
+    conditional_cov = A - np.matmul(C, solved[:, 1:])
 
     return conditional_mean, conditional_cov
 
@@ -229,35 +257,28 @@ def conjugate_update_univariate(prior_mu, prior_var, lik_mu, lik_var):
     return new_mean, new_var
 
 
-def linear_regression_online_update(m_km1, P_km1, H, m_obs, var_obs):
-    # m_km1: Prior mean
-    # P_km1: Prior cov
-    # H: Link from latent to observed
-    # m_obs: Mean of observation
-    # var_obs: Variance of observation
-    # Returns mean, cov, and _negative_ log marg lik.
-
-    # We need to work with matrices here or the maths will be wrong
-    assert all(
-        [len(x.shape) == 2 for x in [m_km1, H]]
-    ), "m_km1 and H must have two dimensions each!"
-
-    v_k = m_obs - H @ m_km1
+class LinearGaussianUpdate(object):
+    def __init__(self, H, var_obs):
+        """
+        Wraps linear_regression_online_update for repeated use with a fixed
+        observation model, validating shapes once here rather than on every
+        update.
+        Args:
+            H (np.array): Link from latent to observed.
+            var_obs: Variance of the observations.
+        """
 
-    S_k = H @ P_km1 @ H.T + var_obs
-    K_k = P_km1 @ H.T * (1 / S_k)
-    m_k = m_km1 + K_k * v_k
-    P_k = P_km1 - (K_k * S_k) @ K_k.T
+        assert len(H.shape) == 2, 'H must have two dimensions!'
 
-    # Calculate the log marginal likelihood here too
-    sign, logdet = np.linalg.slogdet(2 * np.pi * S_k)
-    logdet = sign * logdet
+        self.H = H
+        self.var_obs = var_obs
 
-    # Second part
-    quadratic_term = 0.5 * v_k.T @ np.linalg.solve(S_k, v_k)
-    energy_contrib = 0.5 * logdet + quadratic_term
+    def __call__(self, m_km1, P_km1, m_obs):
 
-    return m_k, P_k, np.squeeze(energy_contrib)
+        # Skips the per-call shape assert: H was validated at init, and
+        # m_km1's shape is checked implicitly by the matmul against H.
+        return _linear_regression_online_update(
+            m_km1, P_km1, self.H, m_obs, self.var_obs)
 
 
 def weighted_sum(mean, cov, weights):
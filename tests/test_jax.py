@@ -0,0 +1,24 @@
+import numpy as np
+import jax.numpy as jnp
+from jax import jacobian
+from ml_tools.jax import forward_grad_vector
+from ml_tools.jax_kernels import ard_rbf_kernel
+
+
+def test_forward_grad_vector_against_jacobian():
+
+    np.random.seed(0)
+
+    n, n_c = 6, 3
+
+    x = jnp.array(np.random.randn(n, n_c))
+    lscales = jnp.array(np.random.uniform(1., 2., size=n_c))
+    alpha = 1.3
+
+    kernel_fun = lambda cur_lscales: ard_rbf_kernel(x, x, cur_lscales, alpha)
+
+    result = forward_grad_vector(kernel_fun, 0, n_c, lscales)
+    reference = jacobian(kernel_fun)(lscales)
+
+    assert result.shape == (n, n, n_c)
+    assert np.allclose(np.asarray(result), np.asarray(reference))
@@ -1,5 +1,6 @@
 import numpy as np
-from ml_tools.kernels import ard_rbf_kernel_efficient, additive_rbf_kernel
+from ml_tools.kernels import (ard_rbf_kernel, ard_rbf_kernel_batched,
+                              ard_rbf_kernel_efficient, additive_rbf_kernel)
 
 
 def generate_data(n_1=10, n_2=10, n_c=4):
@@ -15,6 +16,97 @@ def generate_data(n_1=10, n_2=10, n_c=4):
     return n_1, n_2, n_c, lscales, x1, x2
 
 
+def reference_ard_rbf_kernel(x1, x2, lengthscales, alpha, jitter=1e-5):
+    # The direct (N1, N2, D)-broadcast formula ard_rbf_kernel used to be
+    # written with, kept as a reference for the rewritten version.
+
+    sq_differences = (x1[:, None, :] - x2[None, :, :])**2
+    exponent = np.sum(sq_differences / lengthscales**2, axis=2)
+    exponentiated = np.exp(-0.5 * exponent)
+
+    kern = alpha**2 * exponentiated
+    diag_indices = np.diag_indices(np.min(kern.shape[:2]))
+    kern[diag_indices] = kern[diag_indices] + jitter
+
+    alpha_grad = 2 * alpha * exponentiated
+    lengthscale_grads = (alpha**2 * exponentiated[:, :, None] *
+                         sq_differences / lengthscales**3)
+
+    return kern, lengthscale_grads, alpha_grad
+
+
+def test_ard_rbf_kernel_against_broadcast_formula():
+
+    np.random.seed(1)
+
+    n_1, n_2, n_c, lscales, x1, x2 = generate_data()
+
+    alpha = 1.7
+
+    kern, lengthscale_grads, alpha_grad = ard_rbf_kernel(
+        x1, x2, lscales, alpha)
+
+    ref_kern, ref_ls_grads, ref_alpha_grad = reference_ard_rbf_kernel(
+        x1, x2, lscales, alpha)
+
+    assert np.allclose(kern, ref_kern)
+    assert np.allclose(lengthscale_grads, ref_ls_grads)
+    assert np.allclose(alpha_grad, ref_alpha_grad)
+
+    kern_only, ls_grads, a_grad = ard_rbf_kernel(
+        x1, x2, lscales, alpha, return_grads=False)
+
+    assert np.allclose(kern_only, ref_kern)
+    assert ls_grads is None and a_grad is None
+
+
+def test_ard_rbf_kernel_gradients_with_uneven_blocks():
+
+    np.random.seed(2)
+
+    # These shapes give a gradient block size of 8 rows, so N1 = 20 spans
+    # two full tiles plus a partial one.
+    n_1, n_2, n_c = 20, 64, 32
+
+    lscales = np.random.uniform(1., 2., size=n_c)
+    x1 = np.random.randn(n_1, n_c)
+    x2 = np.random.randn(n_2, n_c)
+
+    alpha = 0.8
+
+    kern, lengthscale_grads, _ = ard_rbf_kernel(x1, x2, lscales, alpha)
+
+    ref_kern, ref_ls_grads, _ = reference_ard_rbf_kernel(
+        x1, x2, lscales, alpha)
+
+    assert np.allclose(kern, ref_kern)
+    assert np.allclose(lengthscale_grads, ref_ls_grads)
+
+
+def test_ard_rbf_kernel_batched_against_loop():
+
+    np.random.seed(3)
+
+    n_1, n_2, n_c, _, x1, x2 = generate_data()
+
+    n_candidates = 5
+
+    lscales = np.random.uniform(1., 3., size=(n_candidates, n_c))
+    alphas = np.random.uniform(0.5, 2., size=n_candidates)
+
+    batched = ard_rbf_kernel_batched(x1, x2, lscales, alphas)
+
+    assert batched.shape == (n_candidates, n_1, n_2)
+
+    for cur_candidate in range(n_candidates):
+
+        cur_kern, _, _ = ard_rbf_kernel(
+            x1, x2, lscales[cur_candidate], alphas[cur_candidate],
+            return_grads=False)
+
+        assert np.allclose(batched[cur_candidate], cur_kern)
+
+
 def test_additive_rbf_kernel_against_ard_rbf():
 
     n_1, n_2, n_c, lscales, x1, x2 = generate_data()
@@ -1,11 +1,148 @@
 import numpy as np
+from scipy.linalg import inv
 from ml_tools.normals import (
+    MultivariateNormal, linear_regression_online_update,
     moments_of_linear_combination_rvs, generate_random_pos_def,
     moments_of_linear_combination_rvs_batch,
     moments_of_linear_combination_rvs_selected,
     moments_of_linear_combination_rvs_selected_independent)
 
 
+def reference_online_update(m_km1, P_km1, H, m_obs, var_obs):
+    # The textbook update with explicit inverses and slogdet, as a reference
+    # for the Cholesky/solve-based implementation.
+
+    v_k = m_obs - H @ m_km1
+
+    S_k = H @ P_km1 @ H.T + var_obs
+    K_k = P_km1 @ H.T @ inv(S_k)
+    m_k = m_km1 + K_k @ v_k
+    P_k = P_km1 - K_k @ S_k @ K_k.T
+
+    sign, logdet = np.linalg.slogdet(2 * np.pi * S_k)
+    quadratic_term = 0.5 * v_k.T @ np.linalg.solve(S_k, v_k)
+    energy_contrib = 0.5 * sign * logdet + quadratic_term
+
+    return m_k, P_k, np.squeeze(energy_contrib)
+
+
+def test_online_update_scalar_observation():
+
+    np.random.seed(4)
+
+    n_latent = 5
+
+    m_km1 = np.random.randn(n_latent, 1)
+    P_km1 = generate_random_pos_def(n_latent)
+    H = np.random.randn(1, n_latent)
+    var_obs = 0.3
+    m_obs = 1.2
+
+    m_k, P_k, energy = linear_regression_online_update(
+        m_km1, P_km1, H, m_obs, var_obs)
+
+    ref_m, ref_P, ref_energy = reference_online_update(
+        m_km1, P_km1, H, np.array([[m_obs]]), var_obs)
+
+    assert np.allclose(m_k, ref_m)
+    assert np.allclose(P_k, ref_P)
+    assert np.allclose(energy, ref_energy)
+
+
+def test_online_update_multivariate_observation():
+
+    np.random.seed(5)
+
+    n_latent, n_obs = 5, 3
+
+    m_km1 = np.random.randn(n_latent, 1)
+    P_km1 = generate_random_pos_def(n_latent)
+    H = np.random.randn(n_obs, n_latent)
+    var_obs = generate_random_pos_def(n_obs)
+    m_obs = np.random.randn(n_obs, 1)
+
+    m_k, P_k, energy = linear_regression_online_update(
+        m_km1, P_km1, H, m_obs, var_obs)
+
+    ref_m, ref_P, ref_energy = reference_online_update(
+        m_km1, P_km1, H, m_obs, var_obs)
+
+    assert np.allclose(m_k, ref_m)
+    assert np.allclose(P_k, ref_P)
+    assert np.allclose(energy, ref_energy)
+
+
+def test_multivariate_normal_multiply_and_divide():
+
+    np.random.seed(6)
+
+    n_test = 6
+
+    m1 = np.random.randn(n_test)
+    m2 = np.random.randn(n_test)
+    v_inv1 = generate_random_pos_def(n_test)
+    v_inv2 = generate_random_pos_def(n_test)
+
+    multiplied = MultivariateNormal(m1, v_inv1).multiply(m2, v_inv2)
+
+    summed_inv = v_inv1 + v_inv2
+    ref_m = inv(summed_inv) @ (v_inv1 @ m1 + v_inv2 @ m2)
+
+    assert np.allclose(multiplied.m, ref_m)
+    assert np.allclose(multiplied.v_inv, summed_inv)
+
+    # Dividing the product by the second factor should recover the first.
+    divided = multiplied.divide(m2, v_inv2)
+
+    assert np.allclose(divided.m, m1)
+    assert np.allclose(divided.v_inv, v_inv1)
+
+
+def test_multivariate_normal_divide_non_pos_def():
+
+    np.random.seed(7)
+
+    n_test = 6
+
+    m1 = np.random.randn(n_test)
+    m2 = np.random.randn(n_test)
+    v_inv1 = generate_random_pos_def(n_test)
+
+    # Subtracting a larger precision makes the difference indefinite, which
+    # must take the symmetric-solve fallback rather than the Cholesky.
+    v_inv2 = v_inv1 + 5 * np.eye(n_test)
+
+    divided = MultivariateNormal(m1, v_inv1).divide(m2, v_inv2)
+
+    subtracted_inv = v_inv1 - v_inv2
+    ref_m = inv(subtracted_inv) @ (v_inv1 @ m1 - v_inv2 @ m2)
+
+    assert np.allclose(divided.m, ref_m)
+    assert np.allclose(divided.v_inv, subtracted_inv)
+
+
+def test_multivariate_normal_marginals_and_weighted_sum():
+
+    np.random.seed(8)
+
+    n_test = 6
+
+    m = np.random.randn(n_test)
+    v_inv = generate_random_pos_def(n_test)
+    weights = np.random.randn(n_test)
+
+    dist = MultivariateNormal(m, v_inv)
+
+    cov = inv(v_inv)
+
+    assert np.allclose(dist.get_marginal_var(), np.diag(cov))
+
+    sum_mean, sum_var = dist.weighted_sum(weights)
+
+    assert np.allclose(sum_mean, m @ weights)
+    assert np.allclose(sum_var, weights @ cov @ weights)
+
+
 def test_moments_of_linear_combination_rvs():
 
     np.random.seed(2)